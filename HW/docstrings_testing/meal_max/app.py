@@ -300,7 +300,8 @@ def get_leaderboard() -> Response:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
         app.logger.info("Generating leaderboard sorted by %s", sort_by)
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+        # MealRow tuples serialize as arrays; convert to dicts at the API boundary
+        leaderboard_data = [row._asdict() for row in kitchen_model.get_leaderboard(sort_by)]
 
         return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
     except Exception as e:
@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from typing import List
 
 from meal_max.models.kitchen_model import Meal, update_meal_stats
@@ -10,6 +11,20 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+_DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+
+@lru_cache(maxsize=1024)
+def _score(price: float, cuisine_len: int, difficulty: str) -> float:
+    """
+    Computes the battle score from a meal's fields.
+
+    Pure in its inputs, so repeat battles with the same meals become a
+    cache lookup instead of a recomputation.
+    """
+    return (price * cuisine_len) - _DIFFICULTY_MODIFIER[difficulty]
+
+
 class BattleModel:
     """
     A class to manage a battle between meals. 
@@ -62,8 +77,9 @@ class BattleModel:
         # Log the delta and normalized delta
         logger.info("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
-        random_number = get_random()
+        # Get random number from random.org and scale the 1-100 integer draw
+        # down to a fraction comparable with the normalized delta
+        random_number = get_random() / 100
 
         # Log the random number
         logger.info("Random number from random.org: %.3f", random_number)
@@ -106,14 +122,12 @@ class BattleModel:
             The calculated score of the battle. 
         
         """
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
         # Log the calculation process
         logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
                     combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
 
         # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
+        score = _score(combatant.price, len(combatant.cuisine), combatant.difficulty)
 
         # Log the calculated score
         logger.info("Battle score for %s: %.3f", combatant.meal, score)
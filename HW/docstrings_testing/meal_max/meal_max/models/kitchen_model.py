@@ -1,7 +1,10 @@
 from dataclasses import dataclass
+from enum import Enum
 import logging
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import NamedTuple
 
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
@@ -12,7 +15,39 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-@dataclass
+# Valid difficulty levels, hashed once at import so membership checks are O(1).
+_VALID_DIFFICULTY = frozenset(('LOW', 'MED', 'HIGH'))
+
+
+# Short-lived cache of leaderboard results keyed by (sort_by, limit, offset),
+# so repeated page loads do not re-run the sort query. Writers clear it
+# whenever the meals table changes.
+_LEADERBOARD_CACHE: dict[tuple, tuple[float, list]] = {}
+_LEADERBOARD_TTL = 5.0
+_leaderboard_lock = threading.Lock()
+
+class SortBy(Enum):
+    """Supported leaderboard sort orders."""
+    WINS = "wins"
+    WIN_PCT = "win_pct"
+    PRICE = "price"
+
+
+# Pre-built leaderboard queries, one per supported sort order. Building these
+# once at import avoids per-call string assembly and keeps the SQL text stable
+# so sqlite3's per-connection statement cache always hits.
+_LEADERBOARD_BASE_QUERY = """
+    SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct
+    FROM meals WHERE deleted = false AND battles > 0
+"""
+_LB_SQL = {
+    SortBy.WINS: _LEADERBOARD_BASE_QUERY + " ORDER BY wins DESC",
+    SortBy.WIN_PCT: _LEADERBOARD_BASE_QUERY + " ORDER BY win_pct DESC",
+    SortBy.PRICE: _LEADERBOARD_BASE_QUERY + " ORDER BY price DESC",
+}
+
+
+@dataclass(slots=True)
 class Meal:
     id: int
     meal: str
@@ -23,44 +58,80 @@ class Meal:
     def __post_init__(self):
         if self.price < 0:
             raise ValueError("Price must be a positive value.")
-        if self.difficulty not in ['LOW', 'MED', 'HIGH']:
+        if self.difficulty not in _VALID_DIFFICULTY:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
 
 
+class MealRow(NamedTuple):
+    """A single leaderboard row; far lighter than a per-row dict."""
+    id: int
+    meal: str
+    cuisine: str
+    price: float
+    difficulty: str
+    battles: int
+    wins: int
+    win_pct: float
+
+
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
     """
-    Creates a new meal and adds it to the database. 
+    Creates a new meal and adds it to the database.
 
     Args:
-        meal (str): The name of the meal. 
-        cuisine (str): The cuisine of the meal. 
-        price (float): The cost of the meal. 
-        difficulty (str): The level of difficulty of creating the meal. 
+        meal (str): The name of the meal.
+        cuisine (str): The cuisine of the meal.
+        price (float): The cost of the meal.
+        difficulty (str): The level of difficulty of creating the meal.
 
     Raises:
-        ValueError: If price or difficulty are invalid.
-        sqlite3.IntegrityError: If meal with the same name already exists.
+        ValueError: If price or difficulty are invalid, or a meal with the same name already exists.
         sqlite3.Error: For any other database errors.
     """
-    if not isinstance(price, (int, float)) or price <= 0:
-        raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
-    if difficulty not in ['LOW', 'MED', 'HIGH']:
-        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+    try:
+        create_meals([(meal, cuisine, price, difficulty)])
+    except sqlite3.IntegrityError:
+        logger.error("Duplicate meal name: %s", meal)
+        raise ValueError(f"Meal with name '{meal}' already exists")
+
+
+def create_meals(meals: list[tuple[str, str, float, str]]) -> None:
+    """
+    Creates multiple meals in the database within a single transaction.
+
+    Bulk inserts commit once for the whole batch instead of once per row.
+
+    Args:
+        meals (list[tuple]): (meal, cuisine, price, difficulty) tuples to insert.
+
+    Raises:
+        ValueError: If any price or difficulty is invalid.
+        sqlite3.IntegrityError: If a meal with the same name already exists.
+        sqlite3.Error: For any other database errors.
+    """
+    for _, _, price, difficulty in meals:
+        if not isinstance(price, (int, float)) or price <= 0:
+            raise ValueError(f"Invalid price: {price}. Price must be a positive number.")
+        if difficulty not in _VALID_DIFFICULTY:
+            raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            cursor.executemany("""
                 INSERT INTO meals (meal, cuisine, price, difficulty)
                 VALUES (?, ?, ?, ?)
-            """, (meal, cuisine, price, difficulty))
+            """, meals)
             conn.commit()
 
-            logger.info("Meal successfully added to the database: %s", meal)
+            with _leaderboard_lock:
+                _LEADERBOARD_CACHE.clear()
+
+            logger.debug("%d meal(s) successfully added to the database", len(meals))
 
     except sqlite3.IntegrityError:
-        logger.error("Duplicate meal name: %s", meal)
-        raise ValueError(f"Meal with name '{meal}' already exists")
+        logger.error("Duplicate meal name in batch")
+        raise
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
@@ -81,79 +152,106 @@ def delete_meal(meal_id: int) -> None:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
-            try:
-                deleted = cursor.fetchone()[0]
-                if deleted:
-                    logger.info("Meal with ID %s has already been deleted", meal_id)
-                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
-            except TypeError:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
-
-            cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
+            cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ? AND deleted = FALSE RETURNING id", (meal_id,))
+            if cursor.fetchone() is None:
+                # Only hit the table again on the error path to tell
+                # "not found" apart from "already deleted".
+                if _load_meal(conn, meal_id=meal_id) is None:
+                    logger.info("Meal with ID %s not found", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} not found")
+                logger.info("Meal with ID %s has already been deleted", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has been deleted")
             conn.commit()
 
-            logger.info("Meal with ID %s marked as deleted.", meal_id)
+            with _leaderboard_lock:
+                _LEADERBOARD_CACHE.clear()
+
+            logger.debug("Meal with ID %s marked as deleted.", meal_id)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def get_leaderboard(sort_by: str="wins", limit: int | None = None, offset: int = 0) -> list[MealRow]:
     """
     Retrieves all meals that are not marked as deleted from the database.
 
     Args:
-        sort_by (str): If "wins", sort the meals by win_pct in descending order.
+        sort_by (str): One of "wins", "win_pct", or "price"; sorts the meals by that column in descending order.
+        limit (int | None): Maximum number of rows to return; None returns everything.
+        offset (int): Number of rows to skip when limit is set.
 
     Returns:
-        dict[str]: A dictionary of strings representing all non-deleted meals with wins.
+        list[MealRow]: All non-deleted meals with battles, one MealRow per meal.
 
     Logs:
         Warning: If the database is empty.
     """
-    query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
-        FROM meals WHERE deleted = false AND battles > 0
-    """
-
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
-    else:
+    try:
+        sort = SortBy(sort_by)
+    except ValueError:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
 
+    query = _LB_SQL[sort]
+    params = ()
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params = (limit, offset)
+
+    cache_key = (sort.value, limit, offset)
+    with _leaderboard_lock:
+        cached = _LEADERBOARD_CACHE.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < _LEADERBOARD_TTL:
+            logger.debug("Leaderboard served from cache")
+            return cached[1]
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-            if not rows:
+            cursor.execute(query, params)
+
+            # Stream in fixed-size chunks so peak memory stays bounded on
+            # large tables instead of materializing every row at once.
+            leaderboard: list[MealRow] = []
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                leaderboard.extend(MealRow(*row) for row in rows)
+
+            if not leaderboard:
                 logger.warning("The leaderboard is empty.")
                 return []
 
-            leaderboard = []
-            for row in rows:
-                meal = {
-                    'id': row[0],
-                    'meal': row[1],
-                    'cuisine': row[2],
-                    'price': row[3],
-                    'difficulty': row[4]
-                }
-                leaderboard.append(meal)
-
-            logger.info("Leaderboard retrieved successfully")
+            with _leaderboard_lock:
+                _LEADERBOARD_CACHE[cache_key] = (time.monotonic(), leaderboard)
+
             return leaderboard
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+def _load_meal(conn, *, meal_id: int = None, meal_name: str = None) -> tuple | None:
+    """
+    Loads the raw meal row by ID or name with a single query.
+
+    Exactly one of meal_id or meal_name must be provided. Returns None when no
+    meal matches; callers inspect the trailing deleted flag to tell an active
+    meal from a soft-deleted one. Internal fast path for callers that do not
+    need a validated Meal object.
+    """
+    cursor = conn.cursor()
+    if meal_id is not None:
+        cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?", (meal_id,))
+    elif meal_name is not None:
+        cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?", (meal_name,))
+    else:
+        raise ValueError("Either meal_id or meal_name must be provided.")
+    return cursor.fetchone()
+
+
 def get_meal_by_id(meal_id: int) -> Meal:
     """
     Retrieves a meal from the database by its meal ID.
@@ -170,9 +268,7 @@ def get_meal_by_id(meal_id: int) -> Meal:
     """
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?", (meal_id,))
-            row = cursor.fetchone()
+            row = _load_meal(conn, meal_id=meal_id)
 
             if row:
                 if row[5]:
@@ -203,9 +299,7 @@ def get_meal_by_name(meal_name: str) -> Meal:
     """
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?", (meal_name,))
-            row = cursor.fetchone()
+            row = _load_meal(conn, meal_name=meal_name)
 
             if row:
                 if row[5]:
@@ -222,9 +316,16 @@ def get_meal_by_name(meal_name: str) -> Meal:
 """
 
 """
-def get_random_meal() -> Meal:
+def get_random_meal(use_remote_random: bool = False) -> Meal:
     """
-    Retrieves a random meal from the database.
+    Retrieves a random meal from the battle-ready meals in the database.
+
+    By default the selection happens entirely inside SQLite via ORDER BY
+    RANDOM(), avoiding a network round trip. Pass use_remote_random=True to
+    draw the index from random.org instead.
+
+    Args:
+        use_remote_random (bool): If True, pick the index via the random.org API.
 
     Returns:
         Meal: A randomly selected Meal object.
@@ -233,62 +334,82 @@ def get_random_meal() -> Meal:
         ValueError: If the database is empty.
     """
     try:
-        leaderboard = get_leaderboard()
-
-        if not leaderboard:
-            logger.info("Cannot retrieve random meal because the meal database is empty.")
-            raise ValueError("The meal database is empty.")
-
-        # Get a random index using the random.org API
-        random_index = get_random(len(leaderboard))
-        logger.info("Random index selected: %d (total meals: %d)", random_index, len(leaderboard))
-
-        # Return the meal at the random index, adjust for 0-based indexing
-        meal_data = leaderboard[random_index - 1]
-        return Meal(
-            id=meal_data["id"],
-            meal=meal_data["meal"],
-            cuisine=meal_data["cuisine"],
-            price=meal_data["price"],
-            difficulty=meal_data["difficulty"],
-        )
-
-    except Exception as e:
-        logger.error("Error while retrieving random meal: %s", str(e))
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            if use_remote_random:
+                cursor.execute("SELECT COUNT(*) FROM meals WHERE deleted = false AND battles > 0")
+                count = cursor.fetchone()[0]
+
+                if count == 0:
+                    logger.info("Cannot retrieve random meal because the meal database is empty.")
+                    raise ValueError("The meal database is empty.")
+
+                # Get a random index using the random.org API
+                random_index = get_random(count)
+                logger.debug("Random index selected: %d (total meals: %d)", random_index, count)
+
+                # Fetch only the meal at the random index, adjust for 0-based indexing
+                cursor.execute("""
+                    SELECT id, meal, cuisine, price, difficulty
+                    FROM meals WHERE deleted = false AND battles > 0
+                    ORDER BY wins DESC LIMIT 1 OFFSET ?
+                """, (random_index - 1,))
+            else:
+                cursor.execute("""
+                    SELECT id, meal, cuisine, price, difficulty
+                    FROM meals WHERE deleted = false AND battles > 0
+                    ORDER BY RANDOM() LIMIT 1
+                """)
+
+            row = cursor.fetchone()
+
+            if row is None:
+                logger.info("Cannot retrieve random meal because the meal database is empty.")
+                raise ValueError("The meal database is empty.")
+
+            return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
         raise e
 
-def update_meal_stats(meal_id: int, price: float) -> None:
+def update_meal_stats(meal_id: int, result: str) -> None:
     """
-    Increments the battles of a meal by meal ID.
+    Increments the battles of a meal by meal ID, and the wins on a 'win'.
 
     Args:
         meal_id (int): The ID of the meal whose battles should be incremented.
-        result (str): The results of a meal from a battle. 
+        result (str): The result of the battle for this meal: 'win' or 'loss'.
 
     Raises:
-        ValueError: If the meal does not exist or is marked as deleted.
+        ValueError: If the meal does not exist, is marked as deleted, or the result is invalid.
         sqlite3.Error: If there is a database error.
     """
+    if result == 'win':
+        query = "UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ? AND deleted = FALSE RETURNING id"
+    elif result == 'loss':
+        query = "UPDATE meals SET battles = battles + 1 WHERE id = ? AND deleted = FALSE RETURNING id"
+    else:
+        raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
-            try:
-                deleted = cursor.fetchone()[0]
-                if deleted:
-                    logger.info("Meal with ID %s has been deleted", meal_id)
-                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
-            except TypeError:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
-
-            if price >= 0.00:
-                cursor.execute("UPDATE meals SET price = {price} WHERE id = ?", (meal_id,))
-            else:
-                raise ValueError(f"Invalid price: {price}. Expected positive number.")
-
+            cursor.execute(query, (meal_id,))
+            if cursor.fetchone() is None:
+                # Only hit the table again on the error path to tell
+                # "not found" apart from "already deleted".
+                if _load_meal(conn, meal_id=meal_id) is None:
+                    logger.info("Meal with ID %s not found", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} not found")
+                logger.info("Meal with ID %s has been deleted", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has been deleted")
             conn.commit()
 
+            with _leaderboard_lock:
+                _LEADERBOARD_CACHE.clear()
+
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
@@ -1,12 +1,17 @@
 from contextlib import contextmanager
-import re
+from pathlib import Path
+from unittest.mock import MagicMock, Mock
 import sqlite3
 
 import pytest
 
+import meal_max.models.kitchen_model as kitchen_model
+import meal_max.utils.sql_utils as sql_utils
 from meal_max.models.kitchen_model import (
     Meal,
+    MealRow,
     create_meal,
+    create_meals,
     delete_meal,
     get_leaderboard,
     get_meal_by_id,
@@ -22,28 +27,90 @@ from meal_max.models.kitchen_model import (
 ######################################################
 
 def normalize_whitespace(sql_query: str) -> str:
-    return re.sub(r'\s+', ' ', sql_query).strip()
-
-# Mocking the database connection for tests
-@pytest.fixture
-def mock_cursor(mocker):
-    mock_conn = mocker.Mock()
-    mock_cursor = mocker.Mock()
+    # str.split/join collapse whitespace entirely on C-level fast paths
+    return " ".join(sql_query.split())
+
+# Expected SQL as canonical single-line strings; only the query actually
+# captured from the mock needs normalizing at runtime.
+_EXPECTED_INSERT_MEAL_SQL = "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)"
+_EXPECTED_DELETE_MEAL_SQL = "UPDATE meals SET deleted = TRUE WHERE id = ? AND deleted = FALSE RETURNING id"
+_EXPECTED_UPDATE_WIN_SQL = "UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ? AND deleted = FALSE RETURNING id"
+_EXPECTED_GET_BY_ID_SQL = "SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?"
+_EXPECTED_GET_BY_NAME_SQL = "SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?"
+_EXPECTED_LEADERBOARD_SQL = "SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC"
+_EXPECTED_LEADERBOARD_PAGED_SQL = _EXPECTED_LEADERBOARD_SQL + " LIMIT ? OFFSET ?"
+_EXPECTED_LEADERBOARD_BY_PRICE_SQL = "SELECT id, meal, cuisine, price, difficulty, battles, wins, win_pct FROM meals WHERE deleted = false AND battles > 0 ORDER BY price DESC"
+_EXPECTED_RANDOM_MEAL_SQL = "SELECT id, meal, cuisine, price, difficulty FROM meals WHERE deleted = false AND battles > 0 ORDER BY RANDOM() LIMIT 1"
+_EXPECTED_COUNT_MEALS_SQL = "SELECT COUNT(*) FROM meals WHERE deleted = false AND battles > 0"
+_EXPECTED_RANDOM_OFFSET_SQL = "SELECT id, meal, cuisine, price, difficulty FROM meals WHERE deleted = false AND battles > 0 ORDER BY wins DESC LIMIT 1 OFFSET ?"
+
+# Shared row/result pairs, built once at import time instead of per test
+_FETCHONE_ROW = (1, "Meal Name", "Cuisine Type", 8.99, "LOW", False)
+_EXPECTED_MEAL = Meal(1, "Meal Name", "Cuisine Type", 8.99, "LOW")
+_RANDOM_MEAL_ROW = (2, "Meal B", "Cuisine B", 9.99, "MED")
+_MEAL_B = Meal(*_RANDOM_MEAL_ROW)
+
+# Shared leaderboard rows and the MealRow lists the model should build from
+# them, in wins order and in price order
+_LEADERBOARD_ROWS = [
+    (1, "Meal A", "Cuisine A", 8.99, "LOW", 5, 3, 0.6),
+    (2, "Meal B", "Cuisine B", 9.99, "MED", 4, 2, 0.5),
+    (3, "Meal C", "Cuisine C", 10.99, "HIGH", 10, 4, 0.4),
+]
+_EXPECTED_LEADERBOARD = [MealRow(*row) for row in _LEADERBOARD_ROWS]
+_LEADERBOARD_ROWS_BY_PRICE = sorted(_LEADERBOARD_ROWS, key=lambda row: row[3], reverse=True)
+_EXPECTED_LEADERBOARD_BY_PRICE = [MealRow(*row) for row in _LEADERBOARD_ROWS_BY_PRICE]
+
+def _assert_exec(cursor, expected_sql, expected_args, idx=-1):
+    """Assert that an execute call used the expected SQL and arguments.
+
+    idx=-1 checks the most recent call; otherwise the idx-th call. Pass
+    expected_args=None for queries executed without a parameter tuple.
+    """
+    call = cursor.execute.call_args if idx == -1 else cursor.execute.call_args_list[idx]
+    actual_query = normalize_whitespace(call.args[0])
+    assert actual_query == expected_sql
+    if expected_args is not None:
+        assert call.args[1] == expected_args
+
+# Build the mocked connection and patch get_db_connection once per module;
+# creating fresh mocks and re-patching for every test is pure overhead.
+@pytest.fixture(scope="module")
+def _mock_db():
+    # spec'ing against the real sqlite3 classes pins the attribute set up
+    # front instead of lazily growing a child mock per attribute access
+    mock_conn = MagicMock(spec=sqlite3.Connection)
+    mock_cursor = MagicMock(spec=sqlite3.Cursor)
 
     # Mock the connection's cursor
     mock_conn.cursor.return_value = mock_cursor
-    mock_cursor.fetchone.return_value = None  # Default return for queries
-    mock_cursor.fetchall.return_value = []
-    mock_cursor.commit.return_value = None
 
     # Mock the get_db_connection context manager from sql_utils
     @contextmanager
     def mock_get_db_connection():
         yield mock_conn  # Yield the mocked connection object
 
-    mocker.patch("meal_max.models.kitchen_model.get_db_connection", mock_get_db_connection)
+    # setattr on the module object directly skips mock.patch's dotted-path
+    # resolution on every setup/teardown
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr(kitchen_model, "get_db_connection", mock_get_db_connection)
+
+    yield mock_cursor
+
+    monkeypatch.undo()
 
-    return mock_cursor  # Return the mock cursor so we can set expectations per test
+@pytest.fixture
+def mock_cursor(_mock_db):
+    # Make sure no leaderboard results leak between tests
+    kitchen_model._LEADERBOARD_CACHE.clear()
+
+    # Wipe call history and per-test configuration from the shared mock
+    _mock_db.reset_mock(return_value=True, side_effect=True)
+    _mock_db.fetchone.return_value = None  # Default return for queries
+    _mock_db.fetchall.return_value = []
+    _mock_db.fetchmany.return_value = []
+
+    return _mock_db  # Return the mock cursor so we can set expectations per test
 
 ######################################################
 #
@@ -57,28 +124,46 @@ def test_create_meal(mock_cursor):
     # Call the function to create a new meal
     create_meal(meal="Meal Name", cuisine="Cuisine Type", price=8.99, difficulty="LOW")
 
-    expected_query = normalize_whitespace("""
-        INSERT INTO meals (meal, cuisine, price, difficulty)
-        VALUES (?, ?, ?, ?)
-    """)
-
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    actual_query = normalize_whitespace(mock_cursor.executemany.call_args.args[0])
 
     # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert actual_query == _EXPECTED_INSERT_MEAL_SQL
 
-    # Extract the arguments used in the SQL call (second element of call_args)
-    actual_arguments = mock_cursor.execute.call_args[0][1]
+    # Extract the arguments used in the SQL call
+    actual_arguments = mock_cursor.executemany.call_args.args[1]
 
     # Assert that the SQL query was executed with the correct arguments
-    expected_arguments = ("Meal Name", "Cuisine Type", 8.99, "LOW")
-    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+    expected_arguments = [("Meal Name", "Cuisine Type", 8.99, "LOW")]
+    assert actual_arguments == expected_arguments
+
+def test_create_meals(mock_cursor):
+    """Test creating a batch of meals in a single transaction."""
+
+    meals = [
+        ("Meal A", "Cuisine A", 8.99, "LOW"),
+        ("Meal B", "Cuisine B", 9.99, "MED")
+    ]
+
+    # Call the function to create the batch
+    create_meals(meals)
+
+    actual_query = normalize_whitespace(mock_cursor.executemany.call_args.args[0])
+
+    # Assert that the SQL query was correct and received the whole batch
+    assert actual_query == _EXPECTED_INSERT_MEAL_SQL
+    assert mock_cursor.executemany.call_args.args[1] == meals
+
+def test_create_meals_invalid_difficulty():
+    """Test error when a batch contains a meal with an invalid difficulty."""
+
+    with pytest.raises(ValueError, match="Invalid difficulty level: INVALID. Must be 'LOW', 'MED', or 'HIGH'."):
+        create_meals([("Meal A", "Cuisine A", 8.99, "LOW"), ("Meal B", "Cuisine B", 9.99, "INVALID")])
 
 def test_create_meal_duplicate(mock_cursor):
     """Test creating a meal with a duplicate meal (should raise an error)."""
 
     # Simulate that the database will raise an IntegrityError due to a duplicate entry
-    mock_cursor.execute.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed: meals.meal")
+    mock_cursor.executemany.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed: meals.meal")
 
     # Expect the function to raise a ValueError with a specific message when handling the IntegrityError
     with pytest.raises(ValueError, match="Meal with name 'Meal Name' already exists"):
@@ -105,38 +190,19 @@ def test_create_meal_invalid_difficulty():
 def test_delete_meal(mock_cursor):
     """Test soft deleting a meal from the database by meal ID."""
 
-    # Simulate that the meak exists (id = 1)
-    mock_cursor.fetchone.return_value = ([False])
+    # Simulate that the meal exists and was not yet deleted (id = 1)
+    mock_cursor.fetchone.return_value = (1,)
 
     # Call the delete_meal function
     delete_meal(1)
 
-    # Normalize the SQL for both queries (SELECT and UPDATE)
-    expected_select_sql = normalize_whitespace("SELECT deleted FROM meals WHERE id = ?")
-    expected_update_sql = normalize_whitespace("UPDATE meals SET deleted = TRUE WHERE id = ?")
-
-    # Access both calls to `execute()` using `call_args_list`
-    actual_select_sql = normalize_whitespace(mock_cursor.execute.call_args_list[0][0][0])
-    actual_update_sql = normalize_whitespace(mock_cursor.execute.call_args_list[1][0][0])
-
-    # Ensure the correct SQL queries were executed
-    assert actual_select_sql == expected_select_sql, "The SELECT query did not match the expected structure."
-    assert actual_update_sql == expected_update_sql, "The UPDATE query did not match the expected structure."
-
-    # Ensure the correct arguments were used in both SQL queries
-    expected_select_args = (1,)
-    expected_update_args = (1,)
-
-    actual_select_args = mock_cursor.execute.call_args_list[0][0][1]
-    actual_update_args = mock_cursor.execute.call_args_list[1][0][1]
-
-    assert actual_select_args == expected_select_args, f"The SELECT query arguments did not match. Expected {expected_select_args}, got {actual_select_args}."
-    assert actual_update_args == expected_update_args, f"The UPDATE query arguments did not match. Expected {expected_update_args}, got {actual_update_args}."
+    # Ensure the single conditional UPDATE ran with the right arguments
+    _assert_exec(mock_cursor, _EXPECTED_DELETE_MEAL_SQL, (1,))
 
 def test_delete_meal_bad_id(mock_cursor):
     """Test error when trying to delete a non-existent meal."""
 
-    # Simulate that no meal exists with the given ID
+    # Simulate that the UPDATE matched nothing and the existence probe found no row
     mock_cursor.fetchone.return_value = None
 
     # Expect a ValueError when attempting to delete a non-existent meal
@@ -146,8 +212,8 @@ def test_delete_meal_bad_id(mock_cursor):
 def test_delete_meal_already_deleted(mock_cursor):
     """Test error when trying to delete a meal that's already marked as deleted."""
 
-    # Simulate that the meal exists but is already marked as deleted
-    mock_cursor.fetchone.return_value = ([True])
+    # Simulate that the UPDATE matched nothing but the existence probe found the row
+    mock_cursor.fetchone.side_effect = [None, (1,)]
 
     # Expect a ValueError when attempting to delete a meal that's already been deleted
     with pytest.raises(ValueError, match="Meal with ID 999 has been deleted"):
@@ -159,32 +225,24 @@ def test_delete_meal_already_deleted(mock_cursor):
 #
 ######################################################
 
-def test_get_meal_by_id(mock_cursor):
-    # Simulate that the meal exists (id = 1)
-    mock_cursor.fetchone.return_value = (1, "Meal Name", "Cuisine Type", 8.99, "LOW", False)
+# The by-id and by-name lookups share the same scaffolding; parametrizing
+# keeps one test body (and one set of fixture invocations) for both.
+@pytest.mark.parametrize("get_meal_fn, lookup_arg, expected_sql", [
+    (get_meal_by_id, 1, _EXPECTED_GET_BY_ID_SQL),
+    (get_meal_by_name, "Meal Name", _EXPECTED_GET_BY_NAME_SQL),
+])
+def test_get_meal(mock_cursor, get_meal_fn, lookup_arg, expected_sql):
+    # Simulate that the meal exists
+    mock_cursor.fetchone.return_value = _FETCHONE_ROW
 
     # Call the function and check the result
-    result = get_meal_by_id(1)
-
-    # Expected result based on the simulated fetchone return value
-    expected_result = Meal(1, "Meal Name", "Cuisine Type", 8.99, "LOW")
+    result = get_meal_fn(lookup_arg)
 
     # Ensure the result matches the expected output
-    assert result == expected_result, f"Expected {expected_result}, got {result}"
+    assert result == _EXPECTED_MEAL
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-    # Extract the arguments used in the SQL call
-    actual_arguments = mock_cursor.execute.call_args[0][1]
-
-    # Assert that the SQL query was executed with the correct arguments
-    expected_arguments = (1,)
-    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+    # Ensure the lookup SQL ran with the right argument
+    _assert_exec(mock_cursor, expected_sql, (lookup_arg,))
 
 def test_get_meal_by_id_bad_id(mock_cursor):
     # Simulate that no meal exists for the given ID
@@ -194,211 +252,313 @@ def test_get_meal_by_id_bad_id(mock_cursor):
     with pytest.raises(ValueError, match="Meal with ID 999 not found"):
         get_meal_by_id(999)
 
-def test_get_meal_by_name(mock_cursor):
-    # Simulate that the meal exists (meal = "Meal Name")
-    mock_cursor.fetchone.return_value = (1, "Meal Name", "Cuisine Type", 8.99, "LOW", False)
-
-    # Call the function and check the result
-    result = get_meal_by_name("Meal Name")
-
-    # Expected result based on the simulated fetchone return value
-    expected_result = Meal(1, "Meal Name", "Cuisine Type", 8.99, "LOW")
-
-    # Ensure the result matches the expected output
-    assert result == expected_result, f"Expected {expected_result}, got {result}"
-
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-    # Extract the arguments used in the SQL call
-    actual_arguments = mock_cursor.execute.call_args[0][1]
-
-    # Assert that the SQL query was executed with the correct arguments
-    expected_arguments = ("Meal Name",)
-    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
-
 def test_get_leaderboard(mock_cursor):
-    """Test retrieving all meals that are not marked as deleted."""
+    """Test retrieving the leaderboard of meals with battles."""
 
-    # Simulate that there are multiple meals in the database
-    mock_cursor.fetchall.return_value = [
-        (1, "Meal A", "Cuisine A", 8.99, "LOW"),
-        (2, "Meal B", "Cuisine B", 9.99, "MED"),
-        (3, "Meal C", "Cuisine C", 10.99, "HIGH")
-    ]
+    # Simulate that there are multiple meals in the database (one chunk, then done)
+    mock_cursor.fetchmany.side_effect = [_LEADERBOARD_ROWS, []]
 
     # Call the get_leaderboard function
     leaderboard = get_leaderboard()
 
     # Ensure the results match the expected output
-    expected_result = [
-        {"id": 1, "meal": "Meal A", "cuisine": "Cuisine A", "price": 8.99, "difficulty": "LOW"},
-        {"id": 2, "meal": "Meal B", "cuisine": "Cuisine B", "price": 9.99, "difficulty": "MED"},
-        {"id": 3, "meal": "Meal C", "cuisine": "Cuisine C", "price": 10.99, "difficulty": "HIGH"}
-    ]
-
-    assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
+    assert leaderboard == _EXPECTED_LEADERBOARD
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("""
-        SELECT id, meal, cuisine, price, difficulty
-        FROM meals
-        WHERE deleted = FALSE
-    """)
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    _assert_exec(mock_cursor, _EXPECTED_LEADERBOARD_SQL, None)
+
+def test_get_leaderboard_paginated(mock_cursor):
+    """Test that limit/offset are pushed into the SQL query."""
+
+    # Simulate a single page of results
+    mock_cursor.fetchmany.side_effect = [_LEADERBOARD_ROWS[:1], []]
+
+    # Call the get_leaderboard function with pagination
+    leaderboard = get_leaderboard(limit=1, offset=2)
 
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert leaderboard == _EXPECTED_LEADERBOARD[:1]
 
-def test_get_leaderboard_empty(mock_cursor, caplog):
+    # Ensure the SQL query carried the LIMIT/OFFSET and its arguments
+    _assert_exec(mock_cursor, _EXPECTED_LEADERBOARD_PAGED_SQL, (1, 2))
+
+def test_get_leaderboard_empty(mock_cursor, monkeypatch):
     """Test that retrieving leaderboard returns an empty list when it is empty and logs a warning."""
 
     # Simulate that the leaderboard is empty (no meals)
-    mock_cursor.fetchall.return_value = []
+    mock_cursor.fetchmany.return_value = []
+
+    # Capture the warning on the module logger directly; caplog would attach
+    # a handler and format every record just to check one message
+    mock_warning = Mock()
+    monkeypatch.setattr(kitchen_model.logger, "warning", mock_warning)
 
     # Call the get_leaderboard function
     result = get_leaderboard()
 
     # Ensure the result is an empty list
-    assert result == [], f"Expected empty list, but got {result}"
+    assert result == []
 
     # Ensure that a warning was logged
-    assert "The leaderboard is empty." in caplog.text, "Expected warning about empty leaderboard not found in logs."
+    mock_warning.assert_called_once_with("The leaderboard is empty.")
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty FROM meals WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    _assert_exec(mock_cursor, _EXPECTED_LEADERBOARD_SQL, None)
 
 def test_get_all_meals_ordered(mock_cursor):
-    """Test retrieving all songs ordered by battles."""
+    """Test retrieving all meals ordered by price."""
 
-    # Simulate that there are multiple meals in the database
-    mock_cursor.fetchall.return_value = [
-        {3, "Meal C", "Cuisine C", 10.99, "HIGH", 10, 4, 0.4},
-        {1, "Meal A", "Cuisine A", 8.99, "LOW", 5, 3, 0.6},
-        {2, "Meal B", "Cuisine B", 9.99, "MED",  4, 2, 0.5}
-    ]
+    # Simulate that there are multiple meals in the database, in price order
+    mock_cursor.fetchmany.side_effect = [_LEADERBOARD_ROWS_BY_PRICE, []]
 
-    # Call the get_leaderboard function with sort_by = True
+    # Call the get_leaderboard function with sort_by = "price"
     meals = get_leaderboard(sort_by="price")
 
-    # Ensure the results are sorted by wins
-    expected_result = [
-        {"id": 3, "meal": "Meal C", "cuisine": "Cuisine C", "price": 10.99, "difficulty": "HIGH"},
-        {"id": 2, "meal": "Meal B", "cuisine": "Cuisine B", "price": 9.99, "difficulty": "MED"},
-        {"id": 1, "meal": "Meal A", "cuisine": "Cuisine A", "price": 8.99, "difficulty": "LOW"}
-    ]
-
-    assert meals == expected_result, f"Expected {expected_result}, but got {meals}"
+    # Ensure the results are sorted by price
+    assert meals == _EXPECTED_LEADERBOARD_BY_PRICE
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("""
-        SELECT id, meal, cuisine, price, difficulty
-        FROM meals
-        WHERE deleted = FALSE
-        ORDER BY wins DESC
-    """)
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-def test_get_random_meal(mock_cursor, mocker):
-    """Test retrieving a random meal."""
-
-    # Simulate that there are multiple meals in the database
-    mock_cursor.fetchall.return_value = [
-        (1, "Meal A", "Cuisine A", 8.99, "LOW"),
-        (2, "Meal B", "Cuisine B", 9.99, "MED"),
-        (3, "Meal C", "Cuisine C", 10.99, "HIGH")
-    ]
+    _assert_exec(mock_cursor, _EXPECTED_LEADERBOARD_BY_PRICE_SQL, None)
 
-    # Mock random number generation to return the 2nd meal
-    
-    mock_random = mocker.patch("meal_max.models.kitchen_model.get_random", return_value=2)
+def test_get_random_meal(mock_cursor, monkeypatch):
+    """Test retrieving a random meal via SQLite's RANDOM()."""
+
+    # Simulate the single-row fetch of the randomly chosen meal
+    mock_cursor.fetchone.return_value = _RANDOM_MEAL_ROW
+
+    # The local path must not touch random.org
+    mock_random = Mock()
+    monkeypatch.setattr(kitchen_model, "get_random", mock_random)
 
     # Call the get_random_meal method
     result = get_random_meal()
 
-    # Expected result based on the mock random number and fetchall return value
-    expected_result = Meal(2, "Meal B", "Cuisine B", 9.99, "MED")
-
     # Ensure the result matches the expected output
-    assert result == expected_result, f"Expected {expected_result}, got {result}"
+    assert result == _MEAL_B
 
-    # Ensure that the random number was called with the correct number of songs
-    mock_random.assert_called_once_with(3)
+    # Ensure that no network round trip happened
+    mock_random.assert_not_called()
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty, battles, wins FROM meals WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    _assert_exec(mock_cursor, _EXPECTED_RANDOM_MEAL_SQL, None)
 
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+def test_get_random_meal_remote(mock_cursor, monkeypatch):
+    """Test retrieving a random meal with the index drawn from random.org."""
+
+    # Simulate the COUNT query, then the single-row fetch at the random offset
+    mock_cursor.fetchone.side_effect = [(3,), _RANDOM_MEAL_ROW]
+
+    # Mock random number generation to return the 2nd meal
+    mock_random = Mock(return_value=2)
+    monkeypatch.setattr(kitchen_model, "get_random", mock_random)
+
+    # Call the get_random_meal method
+    result = get_random_meal(use_remote_random=True)
 
-def test_get_random_meal_empty(mock_cursor, mocker):
+    # Ensure the result matches the expected output
+    assert result == _MEAL_B
+
+    # Ensure that the random number was called with the correct number of meals
+    mock_random.assert_called_once_with(3)
+
+    # Ensure the COUNT ran first, then the fetch at the 0-based random offset
+    _assert_exec(mock_cursor, _EXPECTED_COUNT_MEALS_SQL, None, idx=0)
+    _assert_exec(mock_cursor, _EXPECTED_RANDOM_OFFSET_SQL, (1,), idx=1)
+
+def test_get_random_meal_empty(mock_cursor, monkeypatch):
     """Test retrieving a random meal when empty."""
 
     # Simulate that the catalog is empty
-    mock_cursor.fetchall.return_value = []
+    mock_cursor.fetchone.return_value = None
 
-    # Expect a ValueError to be raised when calling get_random_song with an empty catalog
+    # Ensure that the random number is not requested since there are no meals
+    mock_random = Mock()
+    monkeypatch.setattr(kitchen_model, "get_random", mock_random)
+
+    # Expect a ValueError to be raised when calling get_random_meal with an empty catalog
     with pytest.raises(ValueError, match="The meal database is empty"):
         get_random_meal()
 
-    # Ensure that the random number was not called since there are no meals
-    mocker.patch("meal_max.models.kitchen_model.get_random").assert_not_called()
+    mock_random.assert_not_called()
 
     # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, meal, cuisine, price, difficulty FROM meals WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    _assert_exec(mock_cursor, _EXPECTED_RANDOM_MEAL_SQL, None)
 
 def test_update_meal_stats(mock_cursor):
-    """Test updating the stats of a meals."""
+    """Test updating the stats of a meal after a win."""
 
     # Simulate that the meal exists and is not deleted (id = 1)
-    mock_cursor.fetchone.return_value = [False]
+    mock_cursor.fetchone.return_value = (1,)
 
     # Call the update_meal_stats function with a sample meal ID
     meal_id = 1
-    update_meal_stats(meal_id, res = "win")
-
-    # Normalize the expected SQL query
-    expected_query = normalize_whitespace("""
-        UPDATE meals SET wins = wins + 1, battles = battles + 1, win_pct = (wins + 1) * 1.0 / (battles + 1) WHERE id = ?
-    """)
-
-    # Ensure the SQL query was executed correctly
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args_list[1][0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-    # Extract the arguments used in the SQL call
-    actual_arguments = mock_cursor.execute.call_args_list[1][0][1]
+    update_meal_stats(meal_id, result="win")
 
-    # Assert that the SQL query was executed with the correct arguments (meal ID)
-    expected_arguments = (meal_id,)
-    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+    # Ensure the single conditional UPDATE ran with the right arguments
+    _assert_exec(mock_cursor, _EXPECTED_UPDATE_WIN_SQL, (meal_id,))
 
 ### Test for Updating a Deleted Meal:
 def test_update_wins_deleted_meal(mock_cursor):
-    """Test error when trying to update play count for a deleted meal."""
+    """Test error when trying to update stats for a deleted meal."""
 
-    # Simulate that the meal exists but is marked as deleted (id = 1)
-    mock_cursor.fetchone.return_value = [True]
+    # Simulate that the UPDATE matched nothing but the existence probe found the row
+    mock_cursor.fetchone.side_effect = [None, (1,)]
 
     # Expect a ValueError when attempting to update a deleted meal
     with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
         update_meal_stats(1, result="win")
 
-    # Ensure that no SQL query for updating play count was executed
-    mock_cursor.execute.assert_called_once_with("SELECT deleted FROM meals WHERE id = ?", (1,))
\ No newline at end of file
+######################################################
+#
+#    Integration tests (real in-memory SQLite)
+#
+######################################################
+
+_SCHEMA_PATH = Path(__file__).resolve().parents[2] / "sql" / "create_meal_table.sql"
+
+_SEED_MEALS = [
+    ("Integration Tacos", "Mexican", 7.5, "LOW"),
+    ("Integration Curry", "Indian", 11.0, "HIGH"),
+    ("Integration Pasta", "Italian", 12.5, "MED"),
+]
+
+@pytest.fixture(scope="module")
+def _real_conn():
+    """One in-memory database per module, seeded once and tuned for test speed."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.executescript(_SCHEMA_PATH.read_text())
+
+    # Seed in one executemany under a single commit instead of row-by-row
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)",
+        _SEED_MEALS,
+    )
+    conn.commit()
+
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def real_db(_real_conn, monkeypatch):
+    # Route kitchen_model at the real connection; the function-scoped
+    # monkeypatch restores the mocked connection for the unit tests above
+    @contextmanager
+    def real_get_db_connection():
+        yield _real_conn
+
+    monkeypatch.setattr(kitchen_model, "get_db_connection", real_get_db_connection)
+    kitchen_model._LEADERBOARD_CACHE.clear()
+
+    yield _real_conn
+
+    # kitchen_model commits inside each call, which would release a SAVEPOINT
+    # opened here mid-test; restore the seeded state directly instead
+    placeholders = ", ".join("?" for _ in _SEED_MEALS)
+    _real_conn.execute(
+        f"DELETE FROM meals WHERE meal NOT IN ({placeholders})",
+        [meal for meal, _, _, _ in _SEED_MEALS],
+    )
+    _real_conn.execute("UPDATE meals SET battles = 0, wins = 0, deleted = FALSE")
+    _real_conn.commit()
+
+def test_create_and_get_meal_roundtrip(real_db):
+    """Test that a created meal can be read back through both lookups."""
+
+    create_meal("Integration Soup", "French", 6.0, "LOW")
+
+    meal = get_meal_by_name("Integration Soup")
+    assert (meal.cuisine, meal.price, meal.difficulty) == ("French", 6.0, "LOW")
+    assert get_meal_by_id(meal.id) == meal
+
+    # The UNIQUE constraint on the real table backs the duplicate check
+    with pytest.raises(ValueError, match="Meal with name 'Integration Pasta' already exists"):
+        create_meal("Integration Pasta", "Italian", 12.5, "MED")
+
+def test_update_stats_feed_leaderboard(real_db):
+    """Test that battle results flow through to real leaderboard rows."""
+
+    winner = get_meal_by_name("Integration Tacos")
+    loser = get_meal_by_name("Integration Curry")
+
+    update_meal_stats(winner.id, "win")
+    update_meal_stats(winner.id, "win")
+    update_meal_stats(loser.id, "loss")
+
+    leaderboard = get_leaderboard()
+    top = leaderboard[0]
+    assert (top.id, top.wins, top.battles, top.win_pct) == (winner.id, 2, 2, 1.0)
+    assert any(row.id == loser.id and row.win_pct == 0.0 for row in leaderboard)
+
+def test_leaderboard_uses_partial_index(real_db):
+    """Test that the leaderboard query is answered from idx_meals_leaderboard.
+
+    SQLite only uses a partial index when the query's WHERE terms literally
+    match the index predicate, so a wording drift between the schema and
+    kitchen_model would silently regress to a full scan plus a sort.
+    """
+
+    rows = real_db.execute("EXPLAIN QUERY PLAN " + _EXPECTED_LEADERBOARD_SQL).fetchall()
+    plan = " | ".join(row[-1] for row in rows)
+    assert "idx_meals_leaderboard" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_repeated_lookups_on_one_connection(real_db):
+    """Test that hot lookups stay correct across many calls on one connection.
+
+    Repeats on a live connection are served from sqlite3's per-connection
+    statement cache; this guards that reuse path against state leaking
+    between calls.
+    """
+
+    meal = get_meal_by_name("Integration Tacos")
+    for _ in range(25):
+        assert get_meal_by_id(meal.id) == meal
+
+def test_failed_delete_releases_write_lock(tmp_path, monkeypatch):
+    """Test that a failed delete does not park a pooled connection mid-transaction.
+
+    Even a no-op UPDATE opens an implicit transaction before the ValueError
+    is raised; the pool has to roll it back on the way in or the write lock
+    is held across checkouts.
+    """
+
+    db_path = tmp_path / "meal_max.db"
+    schema_conn = sqlite3.connect(db_path)
+    schema_conn.executescript(_SCHEMA_PATH.read_text())
+    schema_conn.close()
+
+    # Go through the real pool instead of the mocked/in-memory connections
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(db_path))
+    monkeypatch.setattr(kitchen_model, "get_db_connection", sql_utils.get_db_connection)
+
+    with pytest.raises(ValueError, match="Meal with ID 999 not found"):
+        delete_meal(999)
+
+    # The connection went back to the pool with no transaction pending
+    pooled = sql_utils._connection_pool.get_nowait()
+    try:
+        assert not pooled.in_transaction
+    finally:
+        pooled.close()
+
+    # A second writer is not blocked by the pooled connection
+    writer = sqlite3.connect(db_path, timeout=0.5)
+    writer.execute(
+        "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)",
+        ("Lock Probe", "Probe", 1.0, "LOW"),
+    )
+    writer.commit()
+    writer.close()
+
+def test_delete_meal_hides_meal(real_db):
+    """Test that soft-deleted meals disappear from lookups."""
+
+    meal_id = get_meal_by_name("Integration Pasta").id
+
+    delete_meal(meal_id)
+
+    with pytest.raises(ValueError, match=f"Meal with ID {meal_id} has been deleted"):
+        get_meal_by_id(meal_id)
+    with pytest.raises(ValueError, match=f"Meal with ID {meal_id} has been deleted"):
+        delete_meal(meal_id)
\ No newline at end of file
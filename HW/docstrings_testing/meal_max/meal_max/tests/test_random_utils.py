@@ -4,7 +4,7 @@ import requests
 from meal_max.utils.random_utils import get_random
 
 
-RANDOM_NUMBER = 0.69
+RANDOM_NUMBER = 69
 
 @pytest.fixture
 def mock_random_org(mocker):
@@ -18,7 +18,7 @@ def mock_random_org(mocker):
 
 
 def test_get_random(mock_random_org):
-    """Test retrieving a random number from random.org."""
+    """Test retrieving a random integer from random.org."""
     result = get_random()
 
     # Assert that the result is the mocked random number
@@ -7,16 +7,19 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-def get_random() -> float:
+def get_random(num_meals: int = 100) -> int:
     """
-    Fetches a random decimal number from random.org.
+    Fetches a random integer between 1 and num_meals from random.org.
+
+    Args:
+        num_meals (int): The upper bound of the random draw (inclusive).
 
     Returns:
-        float: The random number fetched from random.org.
+        int: The random integer fetched from random.org.
 
     Raises:
         RuntimeError: If the request to random.org fails or returns an invalid response.
-        ValueError: If the response from random.org is not a valid float.
+        ValueError: If the response from random.org is not a valid integer.
     """
     url = f"https://www.random.org/integers/?num=1&min=1&max={num_meals}&col=1&base=10&format=plain&rnd=new"
 
@@ -32,11 +35,11 @@ def get_random() -> float:
         random_number_str = response.text.strip()
 
         try:
-            random_number = float(random_number_str)
+            random_number = int(random_number_str)
         except ValueError:
             raise ValueError("Invalid response from random.org: %s" % random_number_str)
 
-        logger.info("Received random number: %.3f", random_number)
+        logger.info("Received random number: %d", random_number)
         return random_number
 
     except requests.exceptions.Timeout:
@@ -7,5 +7,20 @@ CREATE TABLE meals (
     difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
-    deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+    deleted BOOLEAN DEFAULT FALSE,
+    -- Computed on read; nothing is stored and no UPDATE ever has to keep it in sync.
+    win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles ELSE 0 END) VIRTUAL
+);
+
+-- Covering indexes for the hot lookup paths in kitchen_model.
+-- Name lookups (get_meal_by_name, duplicate checks) hit the B-tree directly.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meals_name ON meals(meal);
+
+-- Partial covering index matching get_leaderboard's SELECT list and ORDER BY,
+-- so leaderboard queries are answered from the index without a table scan.
+-- The predicate must match the query text exactly (lowercase "false"
+-- included): SQLite's partial-index usability check compares the terms
+-- literally, and a mismatch silently falls back to scan + sort.
+CREATE INDEX IF NOT EXISTS idx_meals_leaderboard
+    ON meals(wins DESC, battles, price, id, cuisine, difficulty)
+    WHERE deleted = false AND battles > 0;
\ No newline at end of file